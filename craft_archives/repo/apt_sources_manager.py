@@ -16,12 +16,13 @@
 #
 """Manage the host's apt source repository configuration."""
 
-import io
+import functools
 import logging
+import os
 import pathlib
 import subprocess
 from pathlib import Path
-from typing import List, Optional, cast
+from typing import Any, Callable, Dict, List, Optional, Type, cast
 
 import distro
 
@@ -33,44 +34,171 @@ logger = logging.getLogger(__name__)
 
 _DEFAULT_SOURCES_DIRECTORY = Path("/etc/apt/sources.list.d")
 
+# Source names that keep their own file name instead of a "craft-" prefix.
+_RESERVED_NAMES = frozenset({"default", "default-security"})
 
-def _construct_deb822_source(
+
+@functools.lru_cache(maxsize=1)
+def _host_codename() -> str:
+    """Get the host OS codename, parsing os-release only once per process."""
+    return distro.codename()
+
+
+@functools.lru_cache(maxsize=1)
+def _host_architecture() -> str:
+    """Get the host architecture, running platform detection only once."""
+    return utils.get_host_architecture()
+
+
+# Precompiled deb-822 templates, keyed on whether a Components line is
+# present. Types and Architectures always appear (they have defaults), so
+# only the Components field changes the output shape. The templates are
+# bytes so the payload is ready to write without a final encode.
+_DEB822_TEMPLATE = (
+    b"Types: %b\n"
+    b"URIs: %b\n"
+    b"Suites: %b\n"
+    b"Architectures: %b\n"
+    b"Signed-By: %b\n"
+)
+_DEB822_TEMPLATE_WITH_COMPONENTS = (
+    b"Types: %b\n"
+    b"URIs: %b\n"
+    b"Suites: %b\n"
+    b"Components: %b\n"
+    b"Architectures: %b\n"
+    b"Signed-By: %b\n"
+)
+
+
+def _format_list(values: List[str]) -> str:
+    """Join field values with spaces, skipping the join for one element.
+
+    The PPA and UCA paths always produce single-element lists; returning
+    the element directly avoids an allocation on that common case.
+    """
+    return values[0] if len(values) == 1 else " ".join(values)
+
+
+def _construct_deb822_source_bytes(
     *,
     architectures: Optional[List[str]] = None,
     components: Optional[List[str]] = None,
     formats: Optional[List[str]] = None,
     suites: List[str],
     url: str,
-    signed_by: pathlib.Path,
-) -> str:
-    """Construct deb-822 formatted sources string."""
-    with io.StringIO() as deb822:
-        if formats:
-            type_text = " ".join(formats)
-        else:
-            type_text = "deb"
-
-        print(f"Types: {type_text}", file=deb822)
-
-        print(f"URIs: {url}", file=deb822)
-
-        suites_text = " ".join(suites)
-        print(f"Suites: {suites_text}", file=deb822)
-
-        if components:
-            components_text = " ".join(components)
-            print(f"Components: {components_text}", file=deb822)
-
-        if architectures:
-            arch_text = " ".join(architectures)
-        else:
-            arch_text = utils.get_host_architecture()
+    signed_by: str,
+) -> bytes:
+    """Construct deb-822 formatted sources as utf-8 encoded bytes."""
+    type_text = _format_list(formats) if formats else "deb"
+
+    if architectures:
+        arch_text = _format_list(architectures)
+    else:
+        arch_text = _host_architecture()
+
+    if components:
+        return _DEB822_TEMPLATE_WITH_COMPONENTS % (
+            type_text.encode(),
+            url.encode(),
+            _format_list(suites).encode(),
+            _format_list(components).encode(),
+            arch_text.encode(),
+            signed_by.encode(),
+        )
 
-        print(f"Architectures: {arch_text}", file=deb822)
+    return _DEB822_TEMPLATE % (
+        type_text.encode(),
+        url.encode(),
+        _format_list(suites).encode(),
+        arch_text.encode(),
+        signed_by.encode(),
+    )
+
+
+def _build_apt_params(
+    package_repo: package_repository.PackageRepositoryApt,
+) -> Dict[str, Any]:
+    """Derive _install_sources parameters for a plain apt repository.
+
+    1) First check to see if package repo is implied path,
+       or "bare repository" config.  This is indicated when no
+       path, components, or suites are indicated.
+    2) If path is specified, convert path to a suite entry,
+       ending with "/".
+
+    Relatedly, this assumes all of the error-checking has been
+    done already on the package_repository object in a proper
+    fashion, but do some sanity checks here anyways.
+    """
+    if (
+        not package_repo.path
+        and not package_repo.components
+        and not package_repo.suites
+    ):
+        suites = ["/"]
+    elif package_repo.path:
+        # Suites denoting exact path must end with exactly one '/'.
+        suites = [package_repo.path.rstrip("/") + "/"]
+    elif package_repo.suites:
+        suites = package_repo.suites
+    else:  # pragma: no cover
+        raise RuntimeError("no suites or path")
+
+    return {
+        "architectures": package_repo.architectures,
+        "components": package_repo.components,
+        "formats": cast(Optional[List[str]], package_repo.formats),
+        "name": package_repo.name,
+        "suites": suites,
+        "url": package_repo.url,
+        "key_id": package_repo.key_id,
+    }
+
+
+def _build_ppa_params(
+    package_repo: package_repository.PackageRepositoryAptPPA,
+) -> Dict[str, Any]:
+    """Derive _install_sources parameters for a PPA repository.
+
+    The codename of the host OS becomes the "suites" entry, the deb URL
+    points to the PPA, and only "deb" formats are enabled.
+    """
+    owner, name = apt_ppa.split_ppa_parts(ppa=package_repo.ppa)
+    codename = _host_codename()
+
+    return {
+        "components": ["main"],
+        "formats": ["deb"],
+        "name": f"ppa-{owner}_{name}",
+        "suites": [codename],
+        "url": f"http://ppa.launchpad.net/{owner}/{name}/ubuntu",
+        "key_id": apt_ppa.get_launchpad_ppa_key_id(ppa=package_repo.ppa),
+    }
+
+
+def _build_uca_params(
+    package_repo: package_repository.PackageRepositoryAptUCA,
+) -> Dict[str, Any]:
+    """Derive _install_sources parameters for a UCA repository.
+
+    The codename of the host OS becomes the "suites" entry, the deb URL
+    points to the UCA, and only "deb" formats are enabled.
+    """
+    cloud = package_repo.cloud
+    pocket = package_repo.pocket
 
-        print(f"Signed-By: {str(signed_by)}", file=deb822)
+    codename = _host_codename()
+    apt_uca.check_release_compatibility(codename, cloud, pocket)
 
-        return deb822.getvalue()
+    return {
+        "components": ["main"],
+        "formats": ["deb"],
+        "name": f"cloud-{cloud}",
+        "suites": [f"{codename}-{pocket}/{cloud}"],
+        "url": package_repository.UCA_ARCHIVE,
+        "key_id": package_repository.UCA_KEY_ID,
+    }
 
 
 class AptSourcesManager:
@@ -79,7 +207,14 @@ class AptSourcesManager:
     :param sources_list_d: Path to sources.list.d directory.
     """
 
-    # pylint: disable=too-few-public-methods
+    __slots__ = (
+        "_sources_list_d",
+        "_sources_list_d_str",
+        "_keyrings_dir",
+        "_dispatch",
+        "_existing_sizes",
+    )
+
     def __init__(
         self,
         *,
@@ -87,7 +222,24 @@ class AptSourcesManager:
         keyrings_dir: Optional[Path] = None,
     ) -> None:
         self._sources_list_d = sources_list_d or _DEFAULT_SOURCES_DIRECTORY
+        self._sources_list_d_str = os.fspath(self._sources_list_d)
+        try:
+            os.makedirs(self._sources_list_d_str, exist_ok=True)
+        except PermissionError:
+            # Unprivileged construction with a read-only /etc; the write
+            # itself will surface a clear error if it matters.
+            pass
         self._keyrings_dir = keyrings_dir or apt_key_manager.KEYRINGS_PATH
+        self._dispatch: Dict[
+            Type[package_repository.PackageRepository], Callable[..., bool]
+        ] = {
+            package_repository.PackageRepositoryAptPPA: self._install_sources_ppa,
+            package_repository.PackageRepositoryAptUCA: self._install_sources_uca,
+            package_repository.PackageRepositoryApt: self._install_sources_apt,
+        }
+        # Size of each existing .sources file, populated by install_many()
+        # so per-repo idempotency checks avoid a stat per file.
+        self._existing_sizes: Optional[Dict[str, int]] = None
 
     def _install_sources(
         self,
@@ -99,181 +251,230 @@ class AptSourcesManager:
         suites: List[str],
         url: str,
         keyring_path: pathlib.Path,
+        keyring_verified: bool = False,
     ) -> bool:
         """Install sources list configuration.
 
         Write config to:
         /etc/apt/sources.list.d/craft-<name>.sources
 
+        Callers that just installed or checked the keyring can pass
+        ``keyring_verified=True`` to skip re-statting it here.
+
         :returns: True if configuration was changed.
         """
-        if keyring_path and not keyring_path.is_file():
+        if not keyring_verified and keyring_path and not keyring_path.is_file():
             raise errors.AptGPGKeyringError(keyring_path)
 
-        config = _construct_deb822_source(
+        encoded = _construct_deb822_source_bytes(
             architectures=architectures,
             components=components,
             formats=formats,
             suites=suites,
             url=url,
-            signed_by=keyring_path,
+            signed_by=os.fspath(keyring_path),
         )
 
-        if name not in ["default", "default-security"]:
+        if name not in _RESERVED_NAMES:
             name = "craft-" + name
 
-        config_path = self._sources_list_d / f"{name}.sources"
-        if config_path.exists() and config_path.read_text() == config:
-            # Already installed and matches, nothing to do.
-            logger.debug(f"Ignoring unchanged sources: {config_path!s}")
-            return False
-
-        config_path.write_text(config)
-        logger.debug(f"Installed sources: {config_path!s}")
+        # Plain string paths: no pathlib machinery on the per-repo hot path.
+        file_name = f"{name}.sources"
+        config_path = f"{self._sources_list_d_str}/{file_name}"
+        if self._existing_sizes is not None:
+            existing_size = self._existing_sizes.get(file_name)
+        else:
+            try:
+                existing_size = os.stat(config_path).st_size
+            except FileNotFoundError:
+                existing_size = None
+        if existing_size == len(encoded):
+            # buffering=0: the file is read and written whole, so the
+            # BufferedIO layer only adds overhead.
+            with open(config_path, "rb", buffering=0) as config_file:
+                if config_file.read() == encoded:
+                    # Already installed and matches, nothing to do.
+                    logger.debug("Ignoring unchanged sources: %s", config_path)
+                    return False
+
+        # The directory is ensured in __init__, so open/write/close are the
+        # only syscalls needed here.
+        fd = os.open(config_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, encoded)
+        finally:
+            os.close(fd)
+        if self._existing_sizes is not None:
+            self._existing_sizes[file_name] = len(encoded)
+        logger.debug("Installed sources: %s", config_path)
         return True
 
-    def _install_sources_apt(
-        self, *, package_repo: package_repository.PackageRepositoryApt
+    def _install_from_builder(
+        self,
+        package_repo: package_repository.PackageRepository,
+        builder: Callable[[Any], Dict[str, Any]],
+        *,
+        keyring_verified: bool = False,
     ) -> bool:
-        """Install repository configuration.
-
-        1) First check to see if package repo is implied path,
-           or "bare repository" config.  This is indicated when no
-           path, components, or suites are indicated.
-        2) If path is specified, convert path to a suite entry,
-           ending with "/".
-
-        Relatedly, this assumes all of the error-checking has been
-        done already on the package_repository object in a proper
-        fashion, but do some sanity checks here anyways.
+        """Install sources from the parameters a builder derives for a repo.
 
         :returns: True if source configuration was changed.
         """
-        if (
-            not package_repo.path
-            and not package_repo.components
-            and not package_repo.suites
-        ):
-            suites = ["/"]
-        elif package_repo.path:
-            # Suites denoting exact path must end with '/'.
-            path = package_repo.path
-            if not path.endswith("/"):
-                path += "/"
-            suites = [path]
-        elif package_repo.suites:
-            suites = package_repo.suites
-        else:  # pragma: no cover
-            raise RuntimeError("no suites or path")
-
-        name = package_repo.name
-
-        keyring_path = apt_key_manager.get_keyring_path(
-            package_repo.key_id, base_path=self._keyrings_dir
+        params = builder(package_repo)
+        key_id = params.pop("key_id")
+        return self._install_sources(
+            **params,
+            keyring_path=apt_key_manager.get_keyring_path(
+                key_id, base_path=self._keyrings_dir
+            ),
+            keyring_verified=keyring_verified,
         )
 
-        return self._install_sources(
-            architectures=package_repo.architectures,
-            components=package_repo.components,
-            formats=cast(Optional[List[str]], package_repo.formats),
-            name=name,
-            suites=suites,
-            url=package_repo.url,
-            keyring_path=keyring_path,
+    def _install_sources_apt(
+        self,
+        *,
+        package_repo: package_repository.PackageRepositoryApt,
+        keyring_verified: bool = False,
+    ) -> bool:
+        """Install repository configuration.
+
+        :returns: True if source configuration was changed.
+        """
+        return self._install_from_builder(
+            package_repo, _build_apt_params, keyring_verified=keyring_verified
         )
 
     def _install_sources_ppa(
-        self, *, package_repo: package_repository.PackageRepositoryAptPPA
+        self,
+        *,
+        package_repo: package_repository.PackageRepositoryAptPPA,
+        keyring_verified: bool = False,
     ) -> bool:
         """Install PPA formatted repository.
 
-        Create a sources list config by:
-        - Looking up the codename of the host OS and using it as the "suites"
-          entry.
-        - Formulate deb URL to point to PPA.
-        - Enable only "deb" formats.
-
         :returns: True if source configuration was changed.
         """
-        owner, name = apt_ppa.split_ppa_parts(ppa=package_repo.ppa)
-        codename = distro.codename()
-
-        key_id = apt_ppa.get_launchpad_ppa_key_id(ppa=package_repo.ppa)
-        keyring_path = apt_key_manager.get_keyring_path(
-            key_id, base_path=self._keyrings_dir
-        )
-
-        return self._install_sources(
-            components=["main"],
-            formats=["deb"],
-            name=f"ppa-{owner}_{name}",
-            suites=[codename],
-            url=f"http://ppa.launchpad.net/{owner}/{name}/ubuntu",
-            keyring_path=keyring_path,
+        return self._install_from_builder(
+            package_repo, _build_ppa_params, keyring_verified=keyring_verified
         )
 
     def _install_sources_uca(
-        self, *, package_repo: package_repository.PackageRepositoryAptUCA
+        self,
+        *,
+        package_repo: package_repository.PackageRepositoryAptUCA,
+        keyring_verified: bool = False,
     ) -> bool:
         """Install UCA formatted repository.
 
-        Create a sources list config by:
-        - Looking up the codename of the host OS and using it as the "suites"
-          entry.
-        - Formulate deb URL to point to UCA.
-        - Enable only "deb" formats.
-
         :returns: True if source configuration was changed.
         """
-        cloud = package_repo.cloud
-        pocket = package_repo.pocket
-
-        codename = distro.codename()
-        apt_uca.check_release_compatibility(codename, cloud, pocket)
-
-        key_id = package_repository.UCA_KEY_ID
-        keyring_path = apt_key_manager.get_keyring_path(
-            key_id, base_path=self._keyrings_dir
-        )
-        return self._install_sources(
-            components=["main"],
-            formats=["deb"],
-            name=f"cloud-{cloud}",
-            suites=[f"{codename}-{pocket}/{cloud}"],
-            url=package_repository.UCA_ARCHIVE,
-            keyring_path=keyring_path,
+        return self._install_from_builder(
+            package_repo, _build_uca_params, keyring_verified=keyring_verified
         )
 
     def install_package_repository_sources(
         self,
         *,
         package_repo: package_repository.PackageRepository,
+        keyring_verified: bool = False,
     ) -> bool:
         """Install configured package repositories.
 
         :param package_repo: Repository to install the source configuration for.
+        :param keyring_verified: Whether the caller has already verified that
+            the repository's keyring is installed, allowing the check here to
+            be skipped.
 
         :returns: True if source configuration was changed.
         """
-        logger.debug(f"Processing repo: {package_repo!r}")
-        if isinstance(package_repo, package_repository.PackageRepositoryAptPPA):
-            return self._install_sources_ppa(package_repo=package_repo)
-
-        if isinstance(package_repo, package_repository.PackageRepositoryAptUCA):
-            return self._install_sources_uca(package_repo=package_repo)
+        logger.debug("Processing repo: %r", package_repo)
+        handler = self._dispatch.get(type(package_repo))
+        if handler is None:
+            # Subclasses are not in the dispatch table; fall back to
+            # isinstance checks for them.
+            if isinstance(package_repo, package_repository.PackageRepositoryAptPPA):
+                handler = self._install_sources_ppa
+            elif isinstance(package_repo, package_repository.PackageRepositoryAptUCA):
+                handler = self._install_sources_uca
+            elif isinstance(package_repo, package_repository.PackageRepositoryApt):
+                handler = self._install_sources_apt
+            else:
+                raise RuntimeError(
+                    f"unhandled package repository: {package_repository!r}"
+                )
+
+        changed = handler(package_repo=package_repo, keyring_verified=keyring_verified)
 
         if isinstance(package_repo, package_repository.PackageRepositoryApt):
-            changed = self._install_sources_apt(package_repo=package_repo)
             architectures = package_repo.architectures
             if changed and architectures:
                 _add_architecture(architectures)
-            return changed
 
-        raise RuntimeError(f"unhandled package repository: {package_repository!r}")
+        return changed
+
+    def install_many(
+        self,
+        *,
+        package_repos: List[package_repository.PackageRepository],
+    ) -> bool:
+        """Install source configuration for multiple package repositories.
+
+        The sources directory is scanned once up front so the per-repo
+        idempotency checks do not stat each file individually.
+
+        :param package_repos: Repositories to install source configurations for.
+
+        :returns: True if any source configuration was changed.
+        """
+        existing_sizes: Dict[str, int] = {}
+        try:
+            with os.scandir(self._sources_list_d_str) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".sources"):
+                        continue
+                    try:
+                        existing_sizes[entry.name] = entry.stat().st_size
+                    except OSError:
+                        # E.g. a dangling symlink; treat it as absent and
+                        # let the write path deal with it.
+                        continue
+        except FileNotFoundError:
+            pass
+        self._existing_sizes = existing_sizes
+
+        changed = False
+        try:
+            for package_repo in package_repos:
+                changed |= self.install_package_repository_sources(
+                    package_repo=package_repo
+                )
+        finally:
+            self._existing_sizes = None
+
+        return changed
 
 
 def _add_architecture(architectures: List[str]) -> None:
-    """Add package repository architecture."""
+    """Add package repository architectures not yet known to dpkg."""
+    result = subprocess.run(
+        ["dpkg", "--print-foreign-architectures"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    existing = set(result.stdout.split())
+    existing.add(_host_architecture())
+
     for arch in architectures:
-        logger.info(f"Add repository architecture: {arch}")
-        subprocess.run(["dpkg", "--add-architecture", arch], check=True)
+        if arch in existing:
+            continue
+        existing.add(arch)
+        logger.info("Add repository architecture: %s", arch)
+        # dpkg needs no stdin and prints nothing useful on success; stderr
+        # stays inherited so failures remain visible.
+        subprocess.run(
+            ["dpkg", "--add-architecture", arch],
+            check=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        )
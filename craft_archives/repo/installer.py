@@ -52,8 +52,10 @@ def install(
         refresh_required |= key_manager.install_package_repository_key(
             package_repo=package_repo
         )
+        # The key manager just ensured the keyring is installed, so the
+        # sources manager does not need to stat it again.
         refresh_required |= sources_manager.install_package_repository_sources(
-            package_repo=package_repo
+            package_repo=package_repo, keyring_verified=True
         )
         if (
             isinstance(
@@ -16,6 +16,7 @@
 
 
 import http
+import subprocess
 import urllib.error
 from textwrap import dedent
 from unittest import mock
@@ -52,7 +53,9 @@ def mock_host_arch(mocker):
     m = mocker.patch("craft_archives.utils.get_host_architecture")
     m.return_value = "FAKE-HOST-ARCH"
 
+    apt_sources_manager._host_architecture.cache_clear()
     yield m
+    apt_sources_manager._host_architecture.cache_clear()
 
 
 @pytest.fixture(autouse=True)
@@ -64,7 +67,9 @@ def mock_run(mocker):
 def mock_version_codename(monkeypatch):
     mock_codename = mock.Mock(return_value="FAKE-CODENAME")
     monkeypatch.setattr(distro, "codename", mock_codename)
+    apt_sources_manager._host_codename.cache_clear()
     yield mock_codename
+    apt_sources_manager._host_codename.cache_clear()
 
 
 @pytest.fixture
@@ -156,6 +161,7 @@ def apt_sources_mgr(tmp_path):
 )
 def test_install(package_repo, name, content_template, apt_sources_mgr, mocker):
     run_mock = mocker.patch("subprocess.run")
+    run_mock.return_value.stdout = ""
     mocker.patch("urllib.request.urlopen")
     sources_path = apt_sources_mgr._sources_list_d / name
 
@@ -176,8 +182,24 @@ def test_install(package_repo, name, content_template, apt_sources_mgr, mocker):
 
     if isinstance(package_repo, PackageRepositoryApt) and package_repo.architectures:
         assert run_mock.mock_calls == [
-            call(["dpkg", "--add-architecture", "amd64"], check=True),
-            call(["dpkg", "--add-architecture", "arm64"], check=True),
+            call(
+                ["dpkg", "--print-foreign-architectures"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ),
+            call(
+                ["dpkg", "--add-architecture", "amd64"],
+                check=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+            ),
+            call(
+                ["dpkg", "--add-architecture", "arm64"],
+                check=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+            ),
         ]
     else:
         assert run_mock.mock_calls == []
@@ -194,6 +216,73 @@ def test_install(package_repo, name, content_template, apt_sources_mgr, mocker):
     assert run_mock.mock_calls == []
 
 
+def test_install_many(apt_sources_mgr, mocker):
+    mocker.patch("urllib.request.urlopen")
+    keyring_path = apt_sources_mgr._keyrings_dir / "craft-AAAAAAAA.gpg"
+    keyring_path.touch(exist_ok=True)
+    mocker.patch(
+        "craft_archives.repo.apt_key_manager.get_keyring_path",
+        return_value=keyring_path,
+    )
+    package_repos = [
+        PackageRepositoryAptPPA(type="apt", ppa="test/ppa"),
+        PackageRepositoryAptUCA(type="apt", cloud="fake-cloud"),
+    ]
+
+    changed = apt_sources_mgr.install_many(package_repos=package_repos)
+
+    assert changed is True
+    sources = sorted(p.name for p in apt_sources_mgr._sources_list_d.iterdir())
+    assert sources == [
+        "craft-cloud-fake-cloud.sources",
+        "craft-ppa-test_ppa.sources",
+    ]
+
+    # Verify a second run does not incur any changes.
+    changed = apt_sources_mgr.install_many(package_repos=package_repos)
+
+    assert changed is False
+
+
+def test_install_many_ignores_dangling_symlink(apt_sources_mgr, mocker):
+    keyring_path = apt_sources_mgr._keyrings_dir / "craft-AAAAAAAA.gpg"
+    keyring_path.touch(exist_ok=True)
+    mocker.patch(
+        "craft_archives.repo.apt_key_manager.get_keyring_path",
+        return_value=keyring_path,
+    )
+    (apt_sources_mgr._sources_list_d / "dangling.sources").symlink_to("missing-target")
+
+    changed = apt_sources_mgr.install_many(
+        package_repos=[PackageRepositoryAptPPA(type="apt", ppa="test/ppa")]
+    )
+
+    assert changed is True
+    assert (apt_sources_mgr._sources_list_d / "craft-ppa-test_ppa.sources").is_file()
+
+
+def test_add_architecture_skips_existing(mocker):
+    run_mock = mocker.patch("subprocess.run")
+    run_mock.return_value.stdout = "arm64\n"
+
+    apt_sources_manager._add_architecture(["amd64", "arm64", "FAKE-HOST-ARCH"])
+
+    assert run_mock.mock_calls == [
+        call(
+            ["dpkg", "--print-foreign-architectures"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ),
+        call(
+            ["dpkg", "--add-architecture", "amd64"],
+            check=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        ),
+    ]
+
+
 def test_install_ppa_invalid(apt_sources_mgr):
     repo = PackageRepositoryAptPPA(type="apt", ppa="ppa-missing-slash")
 
@@ -235,3 +324,20 @@ def test_install_apt_errors(apt_sources_mgr):
     )
     with pytest.raises(errors.AptGPGKeyringError):
         apt_sources_mgr._install_sources_apt(package_repo=repo)
+
+
+def test_install_apt_verified_keyring_skips_check(apt_sources_mgr, mocker):
+    """A pre-verified keyring is not stat'ed again before installing."""
+    repo = PackageRepositoryApt(
+        type="apt",
+        url="https://example.com",
+        suites=["test-suite"],
+        components=["main"],
+        key_id="A" * 40,
+    )
+
+    changed = apt_sources_mgr._install_sources_apt(
+        package_repo=repo, keyring_verified=True
+    )
+
+    assert changed is True